@@ -3,17 +3,42 @@ Main entry point for the OSINT tool.
 This module coordinates the workflow of the application.
 """
 import os
+import queue
+import atexit
 import boto3
+import logging
 import argparse
 import prompt_catalog as pcl
 
 from milvus_operations import MilvusOperations
 from milvus_processor import MilvusProcessor
 from content_fetcher import ContentFetcher
-from document_processor import DocumentProcessor
+from document_processor import DocumentProcessor, OUTPUT_DIR
 from config import ConfigManager
-from llm import bedrock_inference, count_tokens
+from llm import bedrock_inference, count_tokens, tokenize, detokenize
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+
+logger = logging.getLogger(__name__)
+
+
+def setup_logging(level):
+    """
+    Route log records through a queue to a single background writer thread,
+    so pipeline workers never contend for the console while logging.
+    
+    Returns:
+        The started QueueListener
+    """
+    log_queue = queue.SimpleQueue()
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    listener = QueueListener(log_queue, handler)
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(QueueHandler(log_queue))
+    listener.start()
+    return listener
 
 
 def parse_arguments():
@@ -33,58 +58,88 @@ def process_urls(bedrock_client, model_id, guardrail_config, milvus_ops, config_
     Process a list of URLs, scrape their content, and pass it to the LLM for generating the report.
     Also, push the extracted content to Milvus vector database.
     """
-    max_tokens = config_manager.get('MAX_TOKENS')
+    # Bind settings once instead of looking them up at each use
+    cm = config_manager
+    max_tokens, batch_size, max_len, top_k = cm.get('MAX_TOKENS'), cm.get('BATCH_SIZE'), cm.get('MAX_TEXT_LENGTH'), cm.get('TOP_K')
+    collection_name, encode_batch_size, fields = cm.get('COLLECTION_NAME'), cm.get('ENCODE_BATCH_SIZE', 64), cm.get('FIELDS')
+    debug = cm.get('DEBUG', False)
+    
     template_content = DocumentProcessor.read_template(template_path)
     
     # Initialize the MilvusProcessor
     milvus_processor = MilvusProcessor(
         milvus_ops=milvus_ops,
-        collection_name=config_manager.get('COLLECTION_NAME'),
+        collection_name=collection_name,
         embedding_model=config_manager.get_embedding_model(),
-        batch_size=config_manager.get('BATCH_SIZE'),
-        max_text_length=config_manager.get('MAX_TEXT_LENGTH')
+        batch_size=batch_size,
+        max_text_length=max_len,
+        query_encoder=config_manager.cached_encode,
+        encode_batch_size=encode_batch_size,
+        max_concurrency=cm.get('MAX_CONCURRENCY', 20),
+        chunk_workers=cm.get('CHUNK_WORKERS', 1),
+        insert_workers=cm.get('INSERT_WORKERS', 2),
+        writer_threads=cm.get('WRITER_THREADS', 4)
     )
     
     # Ensure collection exists
-    milvus_processor.ensure_collection_exists(config_manager.get('FIELDS'))
+    milvus_processor.ensure_collection_exists(fields)
     
     # Initialize content fetcher
     content_fetcher = ContentFetcher()
     
-    # Process URLs
-    milvus_processor.process_content(urls=url_list, content_fetcher=content_fetcher)
+    # Fetch, chunk, embed and insert URL content with the stages overlapping
+    milvus_processor.process_content(
+        urls=url_list,
+        content_fetcher=content_fetcher,
+        encode_batch=config_manager.encode_batch
+    )
+    # Ingestion is done: release the writer threads, and the CPU encoder workers
+    # since queries are encoded in-process
+    milvus_processor.close()
+    config_manager.stop_encode_pool()
     
     # Create search query and retrieve content from Milvus
-    milvus_query = pcl.milvus_query_template.format(entity_name=entity, template_content=template_content)
-    search_results = milvus_processor.search(milvus_query, top_k=config_manager.get('TOP_K'))
+    milvus_query = pcl.milvus_query_tpl.substitute(entity_name=entity, template_content=template_content)
+    # The search must see the rows inserted just above, so it is strongly consistent
+    search_results = milvus_processor.search(milvus_query, top_k=top_k, consistency_level="Strong")
     
     if isinstance(search_results, list):
         aggregated_content = " ".join(search_results)
     else:
         aggregated_content = search_results
     
-    # Check token limit
-    if count_tokens(aggregated_content) > max_tokens:
-        print("Aggregated content exceeds token limit. Truncating...")
-        aggregated_content = aggregated_content[:max_tokens]
+    # Check token limit, truncating in token space so the budget is respected
+    token_ids = tokenize(aggregated_content)
+    if len(token_ids) > max_tokens:
+        logger.warning("Aggregated content exceeds token limit. Truncating...")
+        token_ids = token_ids[:max_tokens]
+        aggregated_content = detokenize(token_ids)
     
     # Generate report if content was retrieved
     if aggregated_content:
-        generate_report(bedrock_client, model_id, guardrail_config, prompt, entity, template_content, aggregated_content, input_file)
+        generate_report(bedrock_client, model_id, guardrail_config, prompt, entity, template_content, aggregated_content, input_file,
+                        content_tokens=len(token_ids), debug=debug)
     else:
-        print("No content was retrieved from the Milvus database")
+        logger.warning("No content was retrieved from the Milvus database")
     
     # Disconnect from Milvus
     milvus_ops.disconnect_from_milvus()
 
 
-def generate_report(bedrock_client, model_id, guardrail_config, system_prompt, entity_name, template_content, aggregated_content, input_file_name):
+def generate_report(bedrock_client, model_id, guardrail_config, system_prompt, entity_name, template_content, aggregated_content, input_file_name,
+                    content_tokens=None, debug=False):
     """
     Generate the report using the LLM and save it to a file.
     """
-    print("Passing aggregated content to Bedrock inference...")
-    system_prompt = system_prompt.format(entity_name=entity_name, template_content=template_content, aggregated_content=aggregated_content)
-    _, response = bedrock_inference(bedrock_client, system_prompt, model_id, guardrail_config)
+    logger.info("Passing aggregated content to Bedrock inference...")
+    # The instructions and the content are sent as separate parts of the request
+    system_prompt = system_prompt.substitute(entity_name=entity_name, template_content=template_content)
+    input_tokens = None
+    if debug and content_tokens is not None:
+        # Only the instructions need tokenizing; the content was counted already
+        input_tokens = count_tokens(system_prompt) + count_tokens(pcl.content_preamble) + content_tokens
+    _, response = bedrock_inference(bedrock_client, system_prompt, model_id, guardrail_config, content=aggregated_content,
+                                    preamble=pcl.content_preamble, input_tokens=input_tokens, debug=debug)
     output_message = response['content'][0]['text']
     
     # Save the report
@@ -96,9 +151,9 @@ def validate_args(args):
     Determine the entity name and system prompt based on the provided arguments.
     """
     if args.company_name != 'none':
-        return args.company_name, pcl.company_system_prompt
+        return args.company_name, pcl.company_system_prompt_tpl
     elif args.individual_name != 'none':
-        return args.individual_name, pcl.individual_system_prompt
+        return args.individual_name, pcl.individual_system_prompt_tpl
     elif args.company_name == 'none' and args.individual_name == 'none':
         raise ValueError("Please provide either a company name or an individual name.")
     elif args.company_name != 'none' and args.individual_name != 'none':
@@ -109,12 +164,22 @@ if __name__ == "__main__":
     # Initialize configuration manager
     config_manager = ConfigManager('constants.yaml')
     
+    # Log through a background listener, stopped at exit so pending records are written
+    log_listener = setup_logging(config_manager.get('LOG_LEVEL', 'INFO'))
+    atexit.register(log_listener.stop)
+    
     # Initialize Milvus operations
     milvus_ops = MilvusOperations(
         host=config_manager.get('HOST'),
         port=config_manager.get('PORT'),
         timeout=config_manager.get('TIMEOUT'),
-        db_name=config_manager.get('DATABASE')
+        db_name=config_manager.get('DATABASE'),
+        # Normalized embeddings make inner product equivalent to cosine similarity
+        metric_type="IP" if config_manager.get('NORMALIZE', False) else "L2",
+        hnsw_m=config_manager.get('HNSW_M', 24),
+        hnsw_ef_construction=config_manager.get('HNSW_EF_CONSTRUCTION', 200),
+        search_ef=config_manager.get('SEARCH_EF', 128),
+        consistency_level=config_manager.get('SEARCH_CONSISTENCY_LEVEL', 'Bounded')
     )
     milvus_ops.connect_to_milvus()
     
@@ -129,10 +194,13 @@ if __name__ == "__main__":
     model_id = config_manager.get('MODEL_ID')
     guardrail_config = config_manager.get('GUARDRAIL_CONFIG')
     
+    # Create the report output directory once up front
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    
     # Process input file
     if os.path.exists(docx_file_path):
         urls = DocumentProcessor.extract_urls(docx_file_path)
-        print(f"Found {len(urls)} URLs in the document.")
+        logger.info("Found %d URLs in the document.", len(urls))
         process_urls(bedrock_client, model_id, guardrail_config, milvus_ops, config_manager, urls, docx_file_path, entity_name, system_prompt, template_path)
     else:
-        print(f"File not found: {docx_file_path}")
\ No newline at end of file
+        logger.error("File not found: %s", docx_file_path)
\ No newline at end of file
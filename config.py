@@ -2,8 +2,22 @@
 Configuration manager for the OSINT tool.
 Loads and provides access to configuration settings from YAML file.
 """
+import os
 import yaml
-from sentence_transformers import SentenceTransformer
+import hashlib
+import contextlib
+import functools
+import logging
+import threading
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Upper token-length bounds of the buckets used for batched encoding
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512)
+
+# Upper bound on encoder worker processes, each of which holds its own model copy
+MAX_ENCODE_PROCESSES = 4
 
 class ConfigManager:
     """Manages configuration settings for the OSINT application."""
@@ -18,8 +32,45 @@ class ConfigManager:
         with open(config_path, 'r', encoding='utf-8') as file:
             self.config = yaml.safe_load(file)
         
-        # Initialize the embedding model
-        self.embedding_model = SentenceTransformer(self.config['EMBEDDING_MODEL'])
+        # The embedding model is loaded on first use by get_embedding_model
+        self._embedding_model = None
+        
+        # CPU-only encoding runs in a pool of worker processes, started on first use
+        self._encode_pool = None
+        self._encode_pool_lock = threading.Lock()
+        
+        # Query embeddings are cached in memory and on disk, keyed by content hash
+        self.embedding_cache_dir = os.path.expanduser(self.config.get('EMBEDDING_CACHE_DIR', '~/.cache/osint/emb'))
+        self._encode_by_key = functools.lru_cache(maxsize=128)(self._encode_by_key)
+    
+    def _apply_dtype(self, dtype, device):
+        """
+        Cast the embedding model to a reduced precision if requested and supported.
+        
+        Args:
+            dtype: One of 'float32', 'float16', 'bfloat16' or 'auto'. 'auto' picks
+                float16 on CUDA, bfloat16 on BF16-capable CPUs and float32 otherwise.
+            device: Device the model was loaded on, 'cuda' or 'cpu'
+        """
+        import torch
+        
+        cuda_available = device == 'cuda'
+        bf16_supported = getattr(torch.cpu, '_is_bf16_supported', lambda: False)()
+        
+        if dtype == 'auto':
+            if cuda_available:
+                dtype = 'float16'
+            elif bf16_supported:
+                dtype = 'bfloat16'
+            else:
+                dtype = 'float32'
+        
+        if dtype == 'float16' and cuda_available:
+            self._embedding_model.half()
+        elif dtype == 'bfloat16' and (cuda_available or bf16_supported):
+            self._embedding_model = self._embedding_model.to(torch.bfloat16)
+        elif dtype != 'float32':
+            logger.warning("Embedding dtype '%s' is not supported on this device. Using float32.", dtype)
     
     def get(self, key, default=None):
         """
@@ -35,5 +86,200 @@ class ConfigManager:
         return self.config.get(key, default)
     
     def get_embedding_model(self):
-        """Get the initialized embedding model."""
-        return self.embedding_model
+        """Get the embedding model, loading it on first use."""
+        if self._embedding_model is None:
+            # Heavy imports are deferred so paths that never embed stay fast to start
+            import torch
+            from sentence_transformers import SentenceTransformer
+            
+            device = self.config.get('DEVICE', 'auto')
+            if device == 'auto':
+                device = 'cuda' if torch.cuda.is_available() else 'cpu'
+            elif device == 'cuda' and not torch.cuda.is_available():
+                logger.warning("CUDA is not available. Using the CPU for embeddings.")
+                device = 'cpu'
+            self._embedding_model = SentenceTransformer(self.config['EMBEDDING_MODEL'], device=device)
+            self._embedding_model.eval()
+            self._apply_dtype(self.config.get('DTYPE', 'float32'), device)
+            if device == 'cuda' and self.config.get('COMPILE_MODEL', False):
+                self._compile_model()
+        return self._embedding_model
+    
+    def _compile_model(self):
+        """Compile the transformer module of the embedding model with torch.compile."""
+        import torch
+        
+        if not hasattr(torch, 'compile'):
+            logger.warning("torch.compile is not available in this PyTorch version. Using eager mode.")
+            return
+        
+        transformer = self._embedding_model[0]
+        eager_model = transformer.auto_model
+        try:
+            # Sequence lengths vary between batches, so let dynamo generalize shapes
+            # after the first recompile instead of recompiling for every length
+            transformer.auto_model = torch.compile(eager_model, mode='reduce-overhead')
+            # Compilation is lazy, so encode once here to surface compile errors now
+            with self._inference_context():
+                self._embedding_model.encode(["warm-up"], show_progress_bar=False)
+        except Exception as e:
+            transformer.auto_model = eager_model
+            logger.warning("Failed to compile embedding model, using eager mode: %s", e)
+    
+    def _get_encode_pool(self):
+        """
+        Get the multi-process encoding pool, starting it on first use.
+        
+        The pool is only used when the model runs on the CPU, where a single process
+        cannot use all cores; on a GPU batched encoding in-process is faster.
+        
+        Returns:
+            The Sentence-Transformers process pool, or None for in-process encoding
+        """
+        with self._encode_pool_lock:
+            if self._encode_pool is None:
+                embedding_model = self.get_embedding_model()
+                processes = self.config.get('ENCODE_PROCESSES', 1) or os.cpu_count() or 1
+                processes = min(processes, MAX_ENCODE_PROCESSES)
+                if embedding_model.device.type != 'cpu' or processes < 2:
+                    return None
+                self._encode_pool = embedding_model.start_multi_process_pool(target_devices=['cpu'] * processes)
+            return self._encode_pool
+    
+    def _inference_context(self):
+        """
+        Context for in-process forward passes: autograd is disabled through
+        inference_mode and, on CUDA, matmuls run under float16 autocast unless the
+        model was explicitly kept in float32 or cast to bfloat16.
+        
+        Returns:
+            A context manager wrapping the encode call
+        """
+        import torch
+        
+        context = contextlib.ExitStack()
+        context.enter_context(torch.inference_mode())
+        if self._embedding_model.device.type == 'cuda' and self.config.get('DTYPE', 'float32') in ('auto', 'float16'):
+            context.enter_context(torch.autocast('cuda', dtype=torch.float16))
+        return context
+    
+    def stop_encode_pool(self):
+        """Stop the multi-process encoding pool if it was started."""
+        with self._encode_pool_lock:
+            if self._encode_pool is not None:
+                self._embedding_model.stop_multi_process_pool(self._encode_pool)
+                self._encode_pool = None
+    
+    def encode_batch(self, texts, batch_size=64):
+        """
+        Encode a list of texts in length-bucketed batches.
+        
+        Texts are grouped into token-length buckets and each bucket is encoded
+        separately, with larger batches for short texts and smaller batches for
+        long ones, so little compute is spent on padding. The embeddings are
+        returned in the original order, L2-normalized when NORMALIZE is set.
+        On CPU-only machines each bucket is spread over a pool of worker processes.
+        
+        Args:
+            texts: List of texts to encode
+            batch_size: Number of texts per forward pass for 64-token texts
+            
+        Returns:
+            NumPy array of embeddings, one row per text
+        """
+        embedding_model = self.get_embedding_model()
+        dimension = embedding_model.get_sentence_embedding_dimension()
+        if not texts:
+            return np.empty((0, dimension), dtype=np.float32)
+        
+        token_ids = embedding_model.tokenizer(texts, add_special_tokens=False)['input_ids']
+        lengths = [len(ids) for ids in token_ids]
+        
+        buckets = {}
+        for i, length in enumerate(lengths):
+            bound = next((b for b in TOKEN_BUCKETS if length <= b), TOKEN_BUCKETS[-1])
+            buckets.setdefault(bound, []).append(i)
+        
+        normalize = self.config.get('NORMALIZE', False)
+        pool = self._get_encode_pool()
+        embeddings = np.empty((len(texts), dimension), dtype=np.float32)
+        for bound, indices in sorted(buckets.items()):
+            indices.sort(key=lambda i: lengths[i])
+            bucket_texts = [texts[i] for i in indices]
+            bucket_batch_size = max(1, batch_size * 64 // bound)
+            if pool is not None:
+                embeddings[indices] = embedding_model.encode_multi_process(
+                    bucket_texts,
+                    pool,
+                    batch_size=bucket_batch_size,
+                    chunk_size=bucket_batch_size * 4,
+                    normalize_embeddings=normalize
+                )
+            else:
+                with self._inference_context():
+                    embeddings[indices] = embedding_model.encode(
+                        bucket_texts,
+                        batch_size=bucket_batch_size,
+                        show_progress_bar=False,
+                        convert_to_numpy=True,
+                        normalize_embeddings=normalize
+                    )
+        return embeddings
+    
+    def cached_encode(self, text):
+        """
+        Encode a single text, reusing a previously computed embedding if available.
+        
+        Args:
+            text: Text to encode
+            
+        Returns:
+            NumPy array with the embedding of the text
+        """
+        # Precision and device change the embedding values, so the ones the model
+        # actually resolved to are part of the key ('auto' settings vary by machine)
+        normalize = self.config.get('NORMALIZE', False)
+        embedding_model = self.get_embedding_model()
+        device = embedding_model.device.type
+        dtype = next(embedding_model.parameters()).dtype
+        key_source = f"{self.config['EMBEDDING_MODEL']}\0{normalize}\0{dtype}\0{device}\0{text}".encode('utf-8')
+        key = hashlib.blake2b(key_source, digest_size=16).hexdigest()
+        return self._encode_by_key(key, text)
+    
+    def _encode_by_key(self, key, text):
+        """
+        Load the embedding for a cache key from disk, encoding and storing it on a miss.
+        
+        Args:
+            key: Content hash of the text
+            text: Text to encode on a cache miss
+            
+        Returns:
+            NumPy array with the embedding of the text
+        """
+        cache_path = os.path.join(self.embedding_cache_dir, f"{key}.npy")
+        if os.path.exists(cache_path):
+            try:
+                return np.load(cache_path)
+            except (OSError, ValueError) as e:
+                # A corrupt or truncated file is treated as a miss and rewritten below
+                logger.warning("Could not read embedding cache file %s: %s", cache_path, e)
+        
+        embedding_model = self.get_embedding_model()
+        with self._inference_context():
+            embedding = embedding_model.encode(
+                text,
+                convert_to_numpy=True,
+                normalize_embeddings=self.config.get('NORMALIZE', False)
+            )
+        try:
+            os.makedirs(self.embedding_cache_dir, exist_ok=True)
+            # Write to a per-process temporary file, then move it into place atomically,
+            # so an interrupted or concurrent write never leaves a partial cache file
+            temp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(temp_path, "wb") as file:
+                np.save(file, embedding)
+            os.replace(temp_path, cache_path)
+        except OSError as e:
+            logger.warning("Could not write embedding cache file %s: %s", cache_path, e)
+        return embedding
@@ -2,21 +2,40 @@
 Web content fetching and processing for the OSINT tool.
 Handles fetching content from URLs and preprocessing text.
 """
-import requests
-from bs4 import BeautifulSoup
+import asyncio
+import logging
+import aiohttp
+import numpy as np
+from selectolax.lexbor import LexborHTMLParser
+
+logger = logging.getLogger(__name__)
 
 # Maximum size for text chunks to stay under Milvus VARCHAR limit (65535)
 MAX_TEXT_SIZE = 65000
 
+_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (compatible; OSINT-Research-Tool)',
+    'Accept-Encoding': 'gzip, deflate'
+}
+
+# Transient gateway errors are retried with exponential backoff
+RETRY_STATUSES = (502, 503, 504)
+MAX_RETRIES = 2
+RETRY_BACKOFF = 0.3
+
 class ContentFetcher:
     """Handles fetching and processing content from web sources."""
     
     @staticmethod
-    def fetch_from_url(url, timeout=10):
+    async def fetch_from_url_async(session, url, timeout=10):
         """
-        Fetch and parse content from a given URL.
+        Fetch and parse content from a given URL without blocking the event loop.
+        
+        Responses with a status in RETRY_STATUSES and connection errors are retried
+        up to MAX_RETRIES times with exponential backoff.
         
         Args:
+            session: aiohttp.ClientSession to issue the request with
             url: The URL to fetch content from
             timeout: Request timeout in seconds
             
@@ -24,14 +43,67 @@ class ContentFetcher:
             Extracted text content or None if fetch fails
         """
         try:
-            response = requests.get(url, timeout=timeout)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-            return soup.get_text()
-        except requests.exceptions.RequestException as e:
-            print(f"Error fetching URL {url}: {e}")
+            for attempt in range(MAX_RETRIES + 1):
+                try:
+                    async with session.get(url, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                        response.raise_for_status()
+                        # Decode with the charset from the HTTP headers before parsing
+                        content = await response.text(errors="replace")
+                    break
+                except (aiohttp.ClientResponseError, aiohttp.ClientConnectionError) as e:
+                    status = getattr(e, 'status', None)
+                    retryable = status in RETRY_STATUSES or isinstance(e, aiohttp.ClientConnectionError)
+                    if not retryable or attempt == MAX_RETRIES:
+                        raise
+                    await asyncio.sleep(RETRY_BACKOFF * 2 ** attempt)
+            # Parsing is CPU-bound, so it runs in a worker thread to keep the loop free
+            return await asyncio.get_running_loop().run_in_executor(None, ContentFetcher.extract_text, content)
+        except Exception as e:
+            # Any failure only drops this URL, never the remaining fetches
+            logger.warning("Error fetching URL %s: %s", url, e)
             return None
     
+    @classmethod
+    async def fetch_many_async(cls, urls, timeout=10, max_concurrency=20):
+        """
+        Fetch content from several URLs concurrently on the running event loop.
+        
+        Args:
+            urls: URLs to fetch content from
+            timeout: Request timeout in seconds
+            max_concurrency: Maximum number of requests in flight at once
+            
+        Yields:
+            (url, text) pairs as each fetch completes; text is None if the fetch fails
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        connector = aiohttp.TCPConnector(limit=max_concurrency)
+        
+        async with aiohttp.ClientSession(headers=_HEADERS, connector=connector) as session:
+            async def fetch(url):
+                async with semaphore:
+                    return url, await cls.fetch_from_url_async(session, url, timeout)
+            
+            for next_result in asyncio.as_completed([fetch(url) for url in urls]):
+                yield await next_result
+    
+    @staticmethod
+    def extract_text(content):
+        """
+        Extract visible text from an HTML document.
+        
+        Args:
+            content: Decoded HTML text; the parser would decode raw bytes as UTF-8
+                regardless of the page's charset
+            
+        Returns:
+            Text of the document body with script, style, nav and footer elements removed
+        """
+        tree = LexborHTMLParser(content)
+        tree.strip_tags(['script', 'style', 'nav', 'footer'])
+        node = tree.body or tree.root
+        return node.text(separator=" ", strip=True) if node is not None else ""
+    
     @staticmethod
     def preprocess_text(text):
         """
@@ -43,11 +115,8 @@ class ContentFetcher:
         Returns:
             Preprocessed text
         """
-        # Remove HTML tags if any remain
-        text = BeautifulSoup(text, 'html.parser').get_text()
-        # Remove leading/trailing whitespace
-        text = text.strip()
-        return text    
+        # Collapse runs of whitespace and strip the ends in a single pass
+        return " ".join(text.split())
     
     @staticmethod
     def split_into_chunks(text, max_length):
@@ -59,43 +128,35 @@ class ContentFetcher:
             max_length: Maximum length of each chunk
             
         Returns:
-            List of text chunks
+            List of non-empty text chunks, none longer than max_length or MAX_TEXT_SIZE
         """
         # Ensure max_length doesn't exceed Milvus VARCHAR limit
         safe_max_length = min(max_length, MAX_TEXT_SIZE)
         
         if len(text) <= safe_max_length:
-            return [text]
+            return [text] if text.strip() else []
             
         words = text.split()
+        if not words:
+            return []
+        
+        # Cumulative length of each word plus its trailing space; a chunk of words
+        # [start, end) fits when cum[end - 1] - cum[start - 1] <= safe_max_length
+        lengths = np.fromiter((len(word) + 1 for word in words), dtype=np.int64, count=len(words))
+        cum = np.cumsum(lengths)
+        
         chunks = []
-        current_chunk = []
-        current_length = 0
-
-        for word in words:
-            word_len = len(word) + 1  # +1 for space
-            if current_length + word_len > safe_max_length:
-                if current_chunk:  # Only add if there's content
-                    chunks.append(" ".join(current_chunk))
-                current_chunk = [word]
-                current_length = word_len
-            else:
-                current_chunk.append(word)
-                current_length += word_len
-
-        if current_chunk:
-            chunks.append(" ".join(current_chunk))
-            
-        # Final validation to ensure no chunk exceeds the limit
-        valid_chunks = []
-        for chunk in chunks:
-            if len(chunk) > safe_max_length:
-                # If a single chunk is still too large, split it at character level
-                for i in range(0, len(chunk), safe_max_length):
-                    sub_chunk = chunk[i:i + safe_max_length]
-                    if sub_chunk:
-                        valid_chunks.append(sub_chunk)
-            else:
-                valid_chunks.append(chunk)
-                
-        return valid_chunks
+        start = 0
+        while start < len(words):
+            offset = cum[start - 1] if start else 0
+            end = int(np.searchsorted(cum, offset + safe_max_length, side='right'))
+            if end <= start:
+                # Only a single word longer than the limit can overflow; split it at character level
+                word = words[start]
+                chunks.extend(word[i:i + safe_max_length] for i in range(0, len(word), safe_max_length))
+                start += 1
+                continue
+            chunks.append(" ".join(words[start:end]))
+            start = end
+        
+        return chunks
@@ -2,10 +2,22 @@
 Document processing utilities for the OSINT tool.
 Handles reading documents, extracting URLs, and saving output.
 """
+import io
 import os
+import re
+import logging
 from docx import Document
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
+# Matches http(s) URLs up to the next whitespace, angle bracket or quote
+_URL_RE = re.compile(r'https?://[^\s<>"\']+')
+
+# Directory where generated reports are saved
+OUTPUT_DIR = "output_files"
+
 class DocumentProcessor:
     """Handles operations related to document processing."""
     
@@ -24,17 +36,17 @@ class DocumentProcessor:
             raise FileNotFoundError(f"Template file not found: {template_path}")
         
         doc = Document(template_path)
-        template_content = ""
-        for paragraph in doc.paragraphs:
-            template_content += paragraph.text + "\n"
-        
-        return template_content.strip()
+        return "\n".join(paragraph.text for paragraph in doc.paragraphs).strip()
     
     @staticmethod
     def extract_urls(docx_path):
         """
         Extract URLs from a .docx file.
         
+        URLs are taken from the paragraph text as well as from hyperlink
+        fields, whose targets do not appear in the text. Duplicates are
+        removed while keeping the order of first appearance.
+        
         Args:
             docx_path: Path to the document containing URLs
             
@@ -45,21 +57,22 @@ class DocumentProcessor:
             raise FileNotFoundError(f"Document file not found: {docx_path}")
             
         doc = Document(docx_path)
-        extracted_urls = []
-        
-        for paragraph in doc.paragraphs:
-            if "http" in paragraph.text:
-                url = paragraph.text.split("http", 1)[1]
-                url = "http" + url.split()[0]
-                extracted_urls.append(url.strip())
-                
-        return extracted_urls
+        text_urls = [match.group(0) for paragraph in doc.paragraphs for match in _URL_RE.finditer(paragraph.text)]
+        hyperlink_urls = [
+            rel.target_ref for rel in doc.part.rels.values()
+            if rel.reltype == RT.HYPERLINK and _URL_RE.match(rel.target_ref)
+        ]
+        return list(dict.fromkeys(text_urls + hyperlink_urls))
     
     @staticmethod
-    def save_report(content, input_file_name, output_dir="output_files"):
+    def save_report(content, input_file_name, output_dir=OUTPUT_DIR):
         """
         Save the generated report to a DOCX file.
         
+        Each line of the content becomes its own paragraph, and the document is
+        written to a temporary file that replaces the target path once complete.
+        The output directory must already exist.
+        
         Args:
             content: The report content
             input_file_name: Original input file name (used for naming)
@@ -74,14 +87,20 @@ class DocumentProcessor:
         output_file_name = f"{input_file_base}_{datetime_str}.docx"
         output_file_path = os.path.join(output_dir, output_file_name)
         
-        # Ensure output directory exists
-        os.makedirs(os.path.dirname(output_file_path), exist_ok=True)
-        
-        # Create and save document
+        # Create the document with one paragraph per non-empty line
         doc = Document()
         doc.add_heading("Generated Report", level=1)
-        doc.add_paragraph(content)
-        doc.save(output_file_path)
+        for line in content.split("\n"):
+            if line:
+                doc.add_paragraph(line)
+        
+        # Serialize in memory, then move into place atomically
+        buffer = io.BytesIO()
+        doc.save(buffer)
+        temp_file_path = f"{output_file_path}.tmp"
+        with open(temp_file_path, "wb") as file:
+            file.write(buffer.getvalue())
+        os.replace(temp_file_path, output_file_path)
         
-        print(f"Report saved to {output_file_path}")
+        logger.info("Report saved to %s", output_file_path)
         return output_file_path
@@ -2,8 +2,14 @@
 LLM integration for the OSINT tool.
 Handles token counting and AWS Bedrock inference.
 """
+import logging
 import tiktoken
 
+logger = logging.getLogger(__name__)
+
+# Encoder is loaded once and reused; building the BPE tables is expensive
+_ENC = tiktoken.get_encoding("cl100k_base")
+
 def count_tokens(text):
     """
     Counts the number of tokens in the given text using the tiktoken library.
@@ -14,10 +20,59 @@ def count_tokens(text):
     Returns:
         Number of tokens in the text
     """
-    tokenizer = tiktoken.get_encoding("cl100k_base")
-    return len(tokenizer.encode(text))
+    return len(_ENC.encode(text, disallowed_special=()))
+
+def tokenize(text):
+    """
+    Encode text into cl100k_base token IDs.
+    
+    Args:
+        text: Text to encode
+        
+    Returns:
+        List of token IDs
+    """
+    return _ENC.encode(text, disallowed_special=())
+
+def detokenize(token_ids):
+    """
+    Decode cl100k_base token IDs back into text.
+    
+    Args:
+        token_ids: Token IDs to decode
+        
+    Returns:
+        The decoded text
+    """
+    return _ENC.decode(token_ids)
+
+def build_messages(system_prompt, content, preamble=""):
+    """
+    Build the Bedrock converse system prompt and messages for a request.
+    
+    The instructions go in the system prompt and the content is sent as its own
+    user content block, so large content is passed through as is rather than
+    copied into one combined prompt string. All blocks stay guarded.
+    
+    Args:
+        system_prompt: Instructions for the model
+        content: Input content for the model
+        preamble: Optional text introducing the content, sent as a separate block
+        
+    Returns:
+        Tuple of (system, messages)
+    """
+    system = [{"guardContent": {"text": {"text": system_prompt}}}]
+    blocks = [preamble, content] if preamble else [content]
+    messages = [
+        {
+            "role": "user",
+            "content": [{"guardContent": {"text": {"text": text}}} for text in blocks]
+        }
+    ]
+    return system, messages
 
-def generate_conversation(bedrock_client, model_id, messages, guardrail_config):
+def generate_conversation(bedrock_client, model_id, messages, guardrail_config, system=None):
     """
     Generate a conversation response from Bedrock.
     
@@ -26,62 +81,61 @@ def generate_conversation(bedrock_client, model_id, messages, guardrail_config):
         model_id: Model ID to use
         messages: Messages for the conversation
         guardrail_config: Guardrail configuration
+        system: Optional system prompt content blocks
         
     Returns:
         Response from Bedrock
     """
+    # The system argument is only passed when given, as boto3 rejects None
+    extra = {"system": system} if system else {}
     response = bedrock_client.converse(
         modelId=model_id,
         messages=messages,
         guardrailConfig=guardrail_config,
         inferenceConfig={"temperature": 0.5},
-        additionalModelRequestFields={"top_k": 5}
+        additionalModelRequestFields={"top_k": 5},
+        **extra
     )
     return response
 
-def bedrock_inference(bedrock_client, system_prompt, model_id, guardrail_config):
+def bedrock_inference(bedrock_client, system_prompt, model_id, guardrail_config, content="", preamble="",
+                      input_tokens=None, debug=False):
     """
     Get inference response from AWS Bedrock.
     
     Args:
         bedrock_client: AWS Bedrock client
-        system_prompt: Prompt to send to the model
+        system_prompt: Instructions to send to the model, or the whole prompt if no content is given
         model_id: Model ID to use
         guardrail_config: Guardrail configuration
+        content: Input content, sent as a user message separate from the instructions
+        preamble: Optional text introducing the content
+        input_tokens: Precomputed token count of the prompt, if already known
+        debug: Whether to log the input token count
         
     Returns:
         Tuple of (time taken, response message)
     """
     try:
-        messages = [
-            {
-                "role": "user",
-                "content": [
-                    {
-                        "guardContent": {
-                            "text": {
-                                "text": system_prompt
-                            }
-                        }
-                    }
-                ]
-            }
-        ]
+        if content:
+            system, messages = build_messages(system_prompt, content, preamble)
+        else:
+            # Without separate content the whole prompt is sent as the user message
+            system, messages = None, build_messages("", system_prompt)[1]
 
-        # Count tokens in the input prompt
-        system_prompt_tokens = count_tokens(system_prompt)
-        print(f"Number of system prompt tokens: {system_prompt_tokens}")
-        input_text = system_prompt
-        input_tokens = count_tokens(input_text)
-        print(f"Number of input tokens: {input_tokens}")
+        # Count tokens in the input prompt only when they will be reported
+        if debug:
+            if input_tokens is None:
+                input_tokens = sum(count_tokens(text) for text in (system_prompt, preamble, content))
+            logger.info("Number of input tokens: %d", input_tokens)
 
         response = generate_conversation(
-            bedrock_client, model_id, messages, guardrail_config)
+            bedrock_client, model_id, messages, guardrail_config, system=system)
         
         output_message = response.get('output', {}).get('message', "")
 
         time = int(response['metrics']['latencyMs']) / 1000
         return time, output_message
     except Exception as e:
-        print(f"A client error occurred: {e}")
+        logger.error("A client error occurred: %s", e)
         return 0, "Error"
@@ -1,18 +1,33 @@
 from pymilvus import connections, Collection, CollectionSchema, FieldSchema, utility, db
 from pymilvus.orm.types import DataType
 import time
-import json
-import tempfile
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
 
 class MilvusOperations:
-    def __init__(self, host, port, timeout, db_name):
+    def __init__(self, host, port, timeout, db_name, metric_type="L2", hnsw_m=24, hnsw_ef_construction=200, search_ef=128,
+                 consistency_level="Bounded"):
         """
-        Initialize the MilvusOperations class with host, port, timeout, and database name.
+        Initialize the MilvusOperations class with host, port, timeout, and database name,
+        plus the HNSW index and search parameters used for the embedding field.
+        consistency_level is the default for searches; a search that must see rows
+        inserted just before it can pass "Strong" instead.
         """
         self.host = host
         self.port = port
         self.timeout = timeout
         self.db_name = db_name
+        self.metric_type = metric_type
+        self.hnsw_m = hnsw_m
+        self.hnsw_ef_construction = hnsw_ef_construction
+        self.search_ef = search_ef
+        self.consistency_level = consistency_level
+        self._collections = {}
+        self._loaded = set()
+        self._vector_dtypes = {}
+        self._metric_types = {}
 
     def connect_to_milvus(self):
         """
@@ -20,11 +35,71 @@ class MilvusOperations:
         """
         try:
             connections.connect(alias="default", host=self.host, port=self.port, timeout=self.timeout, db_name=self.db_name)
-            print("Connected to Milvus")
+            logger.info("Connected to Milvus")
         except Exception as e:
-            print(f"Failed to connect to Milvus: {e}")
+            logger.error("Failed to connect to Milvus: %s", e)
             raise
 
+    def _get(self, collection_name, using="default", load=False):
+        """
+        Return a cached handle for the specified collection, creating it on first use.
+        If load is True, the collection is loaded into memory at most once per process.
+        """
+        key = (using, collection_name)
+        collection = self._collections.get(key)
+        if collection is None:
+            collection = Collection(name=collection_name, using=using)
+            self._collections[key] = collection
+        if load and key not in self._loaded:
+            collection.load()
+            self._loaded.add(key)
+        return collection
+
+    def _vector_dtype(self, collection_name, field_name="embedding", using="default"):
+        """
+        Return the NumPy dtype matching the vector field of the specified collection,
+        float16 for FLOAT16_VECTOR fields and float32 otherwise.
+        """
+        dtypes = self._vector_dtypes.setdefault((using, collection_name), {})
+        dtype = dtypes.get(field_name)
+        if dtype is None:
+            dtype = np.float32
+            for field in self._get(collection_name, using=using).schema.fields:
+                if field.name == field_name and field.dtype == DataType.FLOAT16_VECTOR:
+                    dtype = np.float16
+            dtypes[field_name] = dtype
+        return dtype
+
+    def _metric_type(self, collection_name, field_name="embedding", using="default"):
+        """
+        Return the metric of the existing index on the vector field of the specified
+        collection, falling back to metric_type if the field has no index. Searches
+        must use the metric the index was built with, which for a collection created
+        earlier may differ from the configured one.
+        """
+        metrics = self._metric_types.setdefault((using, collection_name), {})
+        metric = metrics.get(field_name)
+        if metric is None:
+            metric = self.metric_type
+            for index in self._get(collection_name, using=using).indexes:
+                if index.field_name == field_name:
+                    metric = index.params.get("metric_type", metric)
+            if metric != self.metric_type:
+                logger.warning("Collection '%s' is indexed with the %s metric, not %s; searching with %s. "
+                               "Drop and re-create the collection to switch metrics.",
+                               collection_name, metric, self.metric_type, metric)
+            metrics[field_name] = metric
+        return metric
+
+    def _to_vectors(self, collection_name, embeddings, field_name="embedding", using="default"):
+        """
+        Cast embeddings to the collection's vector precision. Float16 vectors are
+        passed as one array per row, which is how pymilvus serializes them.
+        """
+        dtype = self._vector_dtype(collection_name, field_name, using)
+        vectors = np.ascontiguousarray(embeddings, dtype=dtype)
+        return list(vectors) if dtype == np.float16 else vectors
+
     def has_collection(self, collection_name):
         """
         Check if a collection with the given name exists in Milvus.
@@ -38,7 +113,7 @@ class MilvusOperations:
         """
         fields = []
         for field in fields_config:
-            if field['dtype'] == "FLOAT_VECTOR":
+            if field['dtype'] in ("FLOAT_VECTOR", "FLOAT16_VECTOR"):
                 fields.append(FieldSchema(name=field['name'], dtype=DataType[field['dtype']], dim=field['dim']))
             elif field['dtype'] == "VARCHAR":
                 fields.append(FieldSchema(name=field['name'], dtype=DataType[field['dtype']], max_length=field['max_length']))
@@ -47,31 +122,32 @@ class MilvusOperations:
 
         schema = CollectionSchema(fields=fields, description="Collection for storing embeddings and text")
         collection = Collection(name=collection_name, schema=schema)
-        print(f"Collection '{collection_name}' created.")
+        self._collections[("default", collection_name)] = collection
+        logger.info("Collection '%s' created.", collection_name)
         return collection
     
     def create_index(self, collection_name):
         """
         Create indexes for the embedding and text fields in the specified Milvus collection.
         """
-        collection = Collection(name=collection_name)
+        collection = self._get(collection_name)
 
         # Check if an index already exists for the embedding field
         try:
             embedding_index_info = collection.indexes
             if any(index.field_name == "embedding" for index in embedding_index_info):
-                print(f"Index for 'embedding' field already exists in collection '{collection_name}'. Skipping creation.")
+                logger.info("Index for 'embedding' field already exists in collection '%s'. Skipping creation.", collection_name)
             else:
                 embedding_index_params = {
-                    "index_type": "IVF_FLAT",
-                    "metric_type": "L2",
-                    "params": {"nlist": 512}
+                    "index_type": "HNSW",
+                    "metric_type": self.metric_type,
+                    "params": {"M": self.hnsw_m, "efConstruction": self.hnsw_ef_construction}
                 }
-                print(f"Creating index for 'embedding' field in collection '{collection_name}'...")
+                logger.info("Creating index for 'embedding' field in collection '%s'...", collection_name)
                 collection.create_index(field_name="embedding", index_params=embedding_index_params)
-                print("Index for 'embedding' field created.")
+                logger.info("Index for 'embedding' field created.")
         except Exception as e:
-            print(f"Error checking or creating index for 'embedding' field: {e}")
+            logger.error("Error checking or creating index for 'embedding' field: %s", e)
 
         # # Create index for the text field
         # text_index_params = {
@@ -82,19 +158,38 @@ class MilvusOperations:
         # collection.create_index(field_name="text", index_params=text_index_params)
         # print(f"Index for 'text' field created.")
 
-    def insert_data(self, collection_name, ids, embeddings, texts):
+    def insert_data(self, collection_name, ids, embeddings, texts, flush_after_insert=False):
         """
         Insert data into the specified Milvus collection, including text values.
+        Rows are upserted, so rows whose IDs already exist are replaced instead of
+        duplicated and re-running the pipeline over the same content is idempotent.
+        The collection is only flushed when flush_after_insert is set, since each
+        flush is a slow synchronous call; callers inserting many batches should
+        flush once at the end instead.
+        """
+        collection = self._get(collection_name)
+        # IDs go in as a plain list; the embeddings are cast to the vector field's precision
+        ids = ids.tolist() if isinstance(ids, np.ndarray) else ids
+        data = [ids, self._to_vectors(collection_name, embeddings), texts]
+        collection.upsert(data)
+        if flush_after_insert:
+            collection.flush()
+        logger.debug("Upserted %d records into collection '%s'.", len(ids), collection_name)
+    
+    def flush(self, collection_name):
+        """
+        Flush the specified Milvus collection so inserted data is sealed and persisted.
         """
-        collection = Collection(name=collection_name)
-        data = [ids, embeddings, texts]
-        collection.insert(data)
-        print(f"Inserted {len(ids)} records into collection '{collection_name}'.")
+        collection = self._get(collection_name)
+        collection.flush()
+        logger.info("Flushed collection '%s'.", collection_name)
     
-    def do_bulk_insert(self, collection_name, data, column_names, partition_name=None, timeout=None, using="default"):
+    def do_bulk_insert(self, collection_name, data, column_names, partition_name=None, timeout=None, using="default",
+                       embedding_field="embedding"):
         """
-        Perform bulk insertion of data into the specified Milvus collection.
-        Automatically formats the data into the required JSON structure.
+        Perform bulk insertion of data into a new or existing partition of the specified Milvus collection.
+        The rows are converted to columns and inserted directly, with the embedding column
+        cast to the precision of the collection's vector field.
 
         Parameters:
         - collection_name (str): The name of the target collection.
@@ -103,77 +198,76 @@ class MilvusOperations:
         - partition_name (str, optional): The name of the partition to insert data into.
         - timeout (float, optional): Timeout duration for the operation.
         - using (str, optional): The alias of the employed connection.
+        - embedding_field (str, optional): The name of the vector column.
 
         Returns:
-        - int: A bulk-insert task ID.
+        - MutationResult: The result of the insert, including the inserted primary keys.
         """
         try:
             # Generate a unique partition name
             if partition_name is None:
                 partition_name = f"partition_{int(time.time())}"            # Create the partition
-            collection = Collection(name=collection_name)
+            collection = self._get(collection_name, using=using)
             try:
                 if not collection.has_partition(partition_name):
                     collection.create_partition(partition_name)
-                    print(f"Created new partition: {partition_name}")
+                    logger.info("Created new partition: %s", partition_name)
                 else:
-                    print(f"Partition {partition_name} already exists. Proceeding with insertion.")
+                    logger.info("Partition %s already exists. Proceeding with insertion.", partition_name)
             except Exception as e:
-                print(f"Error handling partition: {e}")
+                logger.error("Error handling partition: %s", e)
                 if "already exists" not in str(e).lower():
                     raise
 
-            # Format data into the required JSON structure
-            formatted_data = {"rows": [
-                {column: item[column] for column in column_names} for item in data
-            ]}
-            # print(f"Formatted data for bulk insert: {formatted_data}")
-
-            # Save formatted data to a temporary JSON file
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".json", mode="w") as temp_file:
-                json.dump(formatted_data, temp_file)
-                temp_file_path = temp_file.name
-                print(f"Temporary file created: {temp_file_path}")
-
-            # Perform bulk insert
-            task_id = utility.do_bulk_insert(
-                collection_name=collection_name,
-                files=[temp_file_path],
-                partition_name=partition_name,
-                timeout=timeout
-                # using=using
-            )
-            print(f"Bulk insert initiated with task ID: {task_id} into partition: {partition_name}")
-            return task_id
+            # Convert rows to columns, casting the embeddings to the vector field's precision
+            columns = []
+            for column in column_names:
+                values = [item[column] for item in data]
+                if column == embedding_field:
+                    values = self._to_vectors(collection_name, values, embedding_field, using)
+                columns.append(values)
+
+            result = collection.insert(columns, partition_name=partition_name, timeout=timeout)
+            logger.debug("Bulk inserted %d records into partition: %s", len(data), partition_name)
+            return result
         except Exception as e:
-            print(f"Failed to perform bulk insert: {e}")
+            logger.error("Failed to perform bulk insert: %s", e)
             raise
 
-    def search_in_collection(self, collection_name, query_embedding, top_k=10):
+    def search_in_collection(self, collection_name, query_embedding, top_k=10, partition_names=None, consistency_level=None):
         """
         Search for similar embeddings in the specified Milvus collection.
+        Without explicit partition names, the search covers the whole collection.
         """
-        collection = Collection(name=collection_name)
-        collection.load()
+        return self.search_batch_in_collection(collection_name, [query_embedding], top_k, partition_names,
+                                               consistency_level)[0]
 
-        search_params = {"metric_type": "L2", "params": {"nprobe": 10}}
+    def search_batch_in_collection(self, collection_name, query_embeddings, top_k=10, partition_names=None,
+                                   consistency_level=None):
+        """
+        Search for several query embeddings, given as a 2D array or a list, in one request.
+        Returns one list of matching texts per query, in query order. The consistency
+        level defaults to the one the instance was created with.
+        """
+        collection = self._get(collection_name, load=True)
+
+        # HNSW requires ef to be at least the number of results requested
+        search_params = {"metric_type": self._metric_type(collection_name), "params": {"ef": max(self.search_ef, top_k)}}
         results = collection.search(
-            data=[query_embedding],
+            data=list(self._to_vectors(collection_name, query_embeddings)),
             anns_field="embedding",
             param=search_params,
             limit=top_k,
-            output_fields=["text"]
+            output_fields=["text"],
+            partition_names=partition_names,
+            consistency_level=consistency_level or self.consistency_level
         )
-        # print(f"search_in_collection results : {results}")
-        # Extract the text values from the results
+
+        # Extract the text values from the results of each query
         extracted_texts = []
         for result in results:
-            for hit in result:
-                text_value = hit.entity.get("text")
-                if text_value:
-                    extracted_texts.append(text_value)
-
-        # print(f"Extracted texts: {extracted_texts}")
+            texts = (hit.entity.get("text") for hit in result)
+            extracted_texts.append([text for text in texts if text])
         return extracted_texts
     
     def drop_collection(self, collection_name):
@@ -182,13 +276,20 @@ class MilvusOperations:
         """
         if self.has_collection(collection_name):
             utility.drop_collection(collection_name)
-            print(f"Collection '{collection_name}' has been dropped.")
+            # Forget everything cached about the collection, so a re-created one
+            # with the same name is inspected afresh
+            key = ("default", collection_name)
+            self._collections.pop(key, None)
+            self._loaded.discard(key)
+            self._vector_dtypes.pop(key, None)
+            self._metric_types.pop(key, None)
+            logger.info("Collection '%s' has been dropped.", collection_name)
         else:
-            print(f"Collection '{collection_name}' does not exist. No action taken.")
+            logger.info("Collection '%s' does not exist. No action taken.", collection_name)
 
     def disconnect_from_milvus(self):
         """
         Disconnect from the Milvus server.
         """
         connections.disconnect(alias="default")
-        print("Disconnected from Milvus")
+        logger.info("Disconnected from Milvus")
@@ -3,17 +3,98 @@ Milvus integration for the OSINT tool.
 Handles processing content and inserting it into Milvus vector database.
 """
 import time
+import queue
+import logging
+import asyncio
+import xxhash
+import threading
+import numpy as np
 from tqdm import tqdm
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, wait
+
+logger = logging.getLogger(__name__)
 
 # Maximum size for text chunks to stay under Milvus VARCHAR limit (65535)
 MAX_TEXT_SIZE = 65000
 
+# How long the encoding stage waits for more chunks before encoding a partial batch
+ENCODE_FLUSH_WINDOW = 0.05
+
+# Number of encode batches gathered per encode call, so they can be length-sorted together
+ENCODE_BATCHES_PER_CALL = 16
+
+# Maximum number of items waiting between two pipeline stages
+QUEUE_SIZE = 32
+
+# Maximum number of Milvus insert batches submitted but not yet completed
+MAX_PENDING_INSERTS = 8
+
+# Attempts per insert batch when Milvus reports its task queue is full
+INSERT_RETRIES = 5
+INSERT_RETRY_DELAY = 0.1
+
+# Marks the end of the stream between pipeline stages
+_SENTINEL = None
+
+# How often a stage blocked on a queue checks whether the pipeline was stopped
+STOP_POLL_INTERVAL = 0.1
+
+def chunk_id(chunk):
+    """
+    Compute the Milvus primary key of a text chunk.
+    
+    Args:
+        chunk: Text chunk
+        
+    Returns:
+        Non-negative 63-bit xxHash3 digest of the chunk, stable across runs
+    """
+    return xxhash.xxh3_64_intdigest(chunk.encode('utf-8')) & 0x7FFFFFFFFFFFFFFF
+
+def _put(q, item, stop):
+    """
+    Put an item on a queue, giving up once the pipeline is stopped.
+    
+    Args:
+        q: Queue to put the item on
+        item: Item to queue
+        stop: threading.Event set when the pipeline is stopped
+        
+    Returns:
+        True if the item was queued, False if the pipeline was stopped first
+    """
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=STOP_POLL_INTERVAL)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+def _get(q, stop):
+    """
+    Get an item from a queue, giving up once the pipeline is stopped.
+    
+    Args:
+        q: Queue to get the item from
+        stop: threading.Event set when the pipeline is stopped
+        
+    Returns:
+        The next item, or the end-of-stream sentinel if the pipeline was stopped
+    """
+    while not stop.is_set():
+        try:
+            return q.get(timeout=STOP_POLL_INTERVAL)
+        except queue.Empty:
+            continue
+    return _SENTINEL
+
 class MilvusProcessor:
     """
     A class to handle processing content and inserting it into Milvus vector database.
     """
-    def __init__(self, milvus_ops, collection_name, embedding_model, batch_size, max_text_length):
+    def __init__(self, milvus_ops, collection_name, embedding_model, batch_size, max_text_length, query_encoder=None,
+                 encode_batch_size=64, max_concurrency=20, chunk_workers=1, insert_workers=2, writer_threads=4):
         """
         Initialize the processor with necessary components.
         
@@ -21,14 +102,34 @@ class MilvusProcessor:
             milvus_ops: MilvusOperations instance
             collection_name: Name of the Milvus collection
             embedding_model: Model to generate embeddings
-            batch_size: Number of records to insert in one batch
+            batch_size: Number of records to insert in one batch, accumulated across URLs
             max_text_length: Maximum length for text chunks
+            query_encoder: Callable used to embed search queries (defaults to embedding_model.encode)
+            encode_batch_size: Number of chunks to embed per batch, independent of batch_size
+            max_concurrency: Maximum number of URL fetches in flight at once
+            chunk_workers: Number of threads chunking fetched pages
+            insert_workers: Number of threads turning embedded chunks into rows for insertion
+            writer_threads: Number of threads issuing Milvus insert calls concurrently
         """
         self.milvus_ops = milvus_ops
         self.collection_name = collection_name
         self.embedding_model = embedding_model
         self.batch_size = batch_size
         self.max_text_length = max_text_length
+        self.query_encoder = query_encoder or embedding_model.encode
+        self.encode_batch_size = encode_batch_size
+        self.max_concurrency = max_concurrency
+        self.chunk_workers = chunk_workers
+        self.insert_workers = insert_workers
+        self._lock = threading.Lock()
+        self._insert_pool = ThreadPoolExecutor(max_workers=writer_threads)
+        self._insert_slots = threading.BoundedSemaphore(MAX_PENDING_INSERTS)
+        self._insert_futures = []
+        # Preallocated (ids, embeddings, texts) insert buffers: the one being filled,
+        # its fill count, and those whose rows have been written and can be reused
+        self._buffer = None
+        self._buffer_fill = 0
+        self._free_buffers = queue.SimpleQueue()
     
     def ensure_collection_exists(self, fields_config):
         """
@@ -38,208 +139,419 @@ class MilvusProcessor:
             fields_config: Configuration for collection fields
         """
         if not self.milvus_ops.has_collection(self.collection_name):
-            print(f"Collection '{self.collection_name}' does not exist. Creating it...")
+            logger.info("Collection '%s' does not exist. Creating it...", self.collection_name)
             self.milvus_ops.create_collection(self.collection_name, fields_config)
             self.milvus_ops.create_index(self.collection_name)
         else:
-            print(f"Collection '{self.collection_name}' already exists.")
+            logger.info("Collection '%s' already exists.", self.collection_name)
 
-    def process_content(self, urls, content_fetcher):
+    def process_content(self, urls, content_fetcher, encode_batch):
         """
-        Process content from URLs and store in Milvus.
+        Fetch, chunk, embed and insert URL content into Milvus as an overlapping pipeline.
+        
+        The stages are connected by bounded queues so they overlap and apply
+        backpressure to each other:
+        - one fetch thread runs an asyncio event loop that downloads pages
+        - chunk_workers threads preprocess, chunk and deduplicate the pages
+        - the calling thread embeds the chunks in batches
+        - insert_workers threads write the embedded rows to Milvus
         
         Args:
             urls: List of URLs to process
             content_fetcher: ContentFetcher instance
+            encode_batch: Callable taking (texts, batch_size) and returning embeddings
         """
         overall_start_time = time.time()
         
-        # Process URLs in parallel
-        with ThreadPoolExecutor() as executor:
-            list(tqdm(
-                executor.map(
-                    lambda url: self._process_single_url(url, content_fetcher),
-                    urls
-                ),
-                total=len(urls),
-                desc="Processing URLs"
-            ))
+        self._seen_chunks = set()
+        self._duplicate_chunks = 0
+        
+        fetch_queue = queue.Queue(maxsize=QUEUE_SIZE)
+        chunk_queue = queue.Queue(maxsize=QUEUE_SIZE)
+        row_queue = queue.Queue(maxsize=QUEUE_SIZE)
+        # Set if the encode stage fails, so the upstream stages stop instead of
+        # blocking forever on queues that are no longer drained
+        stop = threading.Event()
+        
+        fetch_thread = threading.Thread(target=self._fetch_stage, args=(urls, content_fetcher, fetch_queue, stop),
+                                        daemon=True)
+        chunk_threads = [
+            threading.Thread(target=self._chunk_stage, args=(content_fetcher, fetch_queue, chunk_queue, stop), daemon=True)
+            for _ in range(self.chunk_workers)
+        ]
+        insert_threads = [
+            threading.Thread(target=self._insert_stage, args=(row_queue,), daemon=True)
+            for _ in range(self.insert_workers)
+        ]
+        threads = [fetch_thread, *chunk_threads, *insert_threads]
+        for thread in threads:
+            thread.start()
+        
+        try:
+            self._encode_stage(chunk_queue, row_queue, encode_batch)
+        except BaseException:
+            stop.set()
+            raise
+        finally:
+            for _ in insert_threads:
+                row_queue.put(_SENTINEL)
+            for thread in threads:
+                thread.join()
+        
+        self.finalize()
         
         overall_end_time = time.time()
-        print(f"Overall time taken to process URLs: {overall_end_time - overall_start_time:.2f} seconds")
+        logger.info("Processed %d URLs into %d unique chunks (%d duplicates skipped) in %.2f seconds",
+                    len(urls), len(self._seen_chunks), self._duplicate_chunks, overall_end_time - overall_start_time)
     
-    def _process_single_url(self, url, content_fetcher):
+    def finalize(self):
         """
-        Process a single URL and insert its content into Milvus.
+        Insert the rows still buffered and flush the Milvus collection once.
+        
+        Waits for all submitted inserts to complete first. Inserts never flush
+        on their own, so this is the only flush of a run.
+        Rows from the last inserts are only guaranteed to be visible to a search
+        issued right after this returns if it uses "Strong" consistency.
+        """
+        self.flush()
+        with self._lock:
+            futures, self._insert_futures = self._insert_futures, []
+        wait(futures)
+        try:
+            self.milvus_ops.flush(self.collection_name)
+        except Exception as e:
+            logger.error("Error flushing Milvus collection '%s': %s", self.collection_name, e)
+    
+    def close(self):
+        """
+        Insert any buffered rows, then shut down the writer pool once its inserts complete.
+        
+        The processor can still search afterwards but can no longer insert.
+        """
+        self.flush()
+        self._insert_pool.shutdown(wait=True)
+    
+    def _fetch_stage(self, urls, content_fetcher, fetch_queue, stop):
+        """
+        Run the asynchronous fetch stage on this thread's own event loop.
         
         Args:
-            url: URL to process
+            urls: List of URLs to process
             content_fetcher: ContentFetcher instance
+            fetch_queue: Queue receiving (url, content) pairs, ended by one sentinel per chunk worker
+            stop: threading.Event set when the pipeline is stopped
         """
-        print(f"Processing URL: {url}")
-        url_start_time = time.time()
-        
         try:
-            # Fetch and preprocess content
-            content = content_fetcher.fetch_from_url(url)
-            if not content:
-                print(f"Failed to fetch content from URL: {url}")
-                return
-            
-            content = content_fetcher.preprocess_text(content)
-            
-            # Always chunk content to ensure it's below Milvus limits
-            chunks = content_fetcher.split_into_chunks(content, min(self.max_text_length, MAX_TEXT_SIZE))
-            
-            if chunks:
-                print(f"Split content into {len(chunks)} chunks.")
-                self._process_chunks(chunks)
-            else:
-                print(f"No valid content chunks to process for URL: {url}")
-                
+            asyncio.run(self._fetch_stage_async(urls, content_fetcher, fetch_queue, stop))
         except Exception as e:
-            print(f"Error processing URL {url}: {e}")
-        
-        url_end_time = time.time()
-        print(f"Time taken to process URL {url}: {url_end_time - url_start_time:.2f} seconds")
+            logger.error("Error fetching URL content: %s", e)
+        finally:
+            for _ in range(self.chunk_workers):
+                _put(fetch_queue, _SENTINEL, stop)
     
-    def _process_chunks(self, chunks):
+    async def _fetch_stage_async(self, urls, content_fetcher, fetch_queue, stop):
         """
-        Process text chunks and prepare them for Milvus insertion.
+        Fetch URLs concurrently and queue each page as it arrives.
+        
+        At most max_concurrency requests are in flight at once. Fetching ends
+        early if the pipeline is stopped.
         
         Args:
-            chunks: List of text chunks
+            urls: List of URLs to process
+            content_fetcher: ContentFetcher instance
+            fetch_queue: Queue receiving (url, content) pairs
+            stop: threading.Event set when the pipeline is stopped
+        """
+        loop = asyncio.get_running_loop()
+        with tqdm(total=len(urls), desc="Processing URLs") as progress:
+            async for url, content in content_fetcher.fetch_many_async(urls, max_concurrency=self.max_concurrency):
+                progress.update(1)
+                # Wait for queue space off the loop so in-flight fetches keep progressing
+                if not await loop.run_in_executor(None, _put, fetch_queue, (url, content), stop):
+                    break
+    
+    def _chunk_stage(self, content_fetcher, fetch_queue, chunk_queue, stop):
         """
-        batch_data = []
-        chunk_ids = {}  # Track IDs to prevent duplicates
+        Chunk fetched pages and queue their unique chunks.
         
-        for chunk_idx, chunk in enumerate(tqdm(chunks, desc="Processing chunks")):
-            # Skip empty chunks
-            if not chunk or not chunk.strip():
-                continue
-                
-            # If chunk exceeds size limit, split it into smaller chunks
-            if len(chunk) > MAX_TEXT_SIZE:
-                print(f"Chunk {chunk_idx} exceeds size limit, splitting into smaller chunks")
-                sub_chunks = []
-                for i in range(0, len(chunk), MAX_TEXT_SIZE):
-                    sub_chunk = chunk[i:i + MAX_TEXT_SIZE]
-                    if sub_chunk.strip():  # Only add non-empty sub-chunks
-                        sub_chunks.append(sub_chunk)
-                
-                print(f"Split oversized chunk into {len(sub_chunks)} sub-chunks")
+        Identical chunks, such as shared page boilerplate, are queued only once
+        across all chunk workers.
+        
+        Args:
+            content_fetcher: ContentFetcher instance
+            fetch_queue: Queue of (url, content) pairs from the fetch stage
+            chunk_queue: Queue receiving (chunk IDs, chunks) pairs of lists, ended by a sentinel from each worker
+            stop: threading.Event set when the pipeline is stopped
+        """
+        try:
+            while True:
+                item = _get(fetch_queue, stop)
+                if item is _SENTINEL:
+                    break
                 
-                # Process each sub-chunk
-                for sub_idx, sub_chunk in enumerate(sub_chunks):
-                    try:
-                        # Generate embedding for sub-chunk
-                        embedding = self.embedding_model.encode(sub_chunk)
-                        
-                        # Create a unique ID for this sub-chunk
-                        sub_unique_id = (hash(sub_chunk) + sub_idx) % 2147483647
-                        if sub_unique_id in chunk_ids:
-                            sub_unique_id = (sub_unique_id + chunk_idx + sub_idx) % 2147483647
-                        chunk_ids[sub_unique_id] = True
-                        
-                        # Add to batch
-                        batch_data.append({
-                            "id": sub_unique_id,
-                            "embedding": embedding.tolist(),
-                            "text": sub_chunk
-                        })
-                        
-                        # Insert batch when batch size is reached
-                        if len(batch_data) >= self.batch_size:
-                            self._insert_batch(batch_data)
-                            batch_data = []
-                    except Exception as e:
-                        print(f"Error processing sub-chunk {sub_idx} of chunk {chunk_idx}: {e}")
+                url, content = item
+                ids, chunks = [], []
+                for chunk in self._collect_url_chunks(url, content, content_fetcher):
+                    key = chunk_id(chunk)
+                    with self._lock:
+                        if key in self._seen_chunks:
+                            self._duplicate_chunks += 1
+                            continue
+                        self._seen_chunks.add(key)
+                    ids.append(key)
+                    chunks.append(chunk)
+                if chunks and not _put(chunk_queue, (ids, chunks), stop):
+                    break
+        finally:
+            _put(chunk_queue, _SENTINEL, stop)
+    
+    def _encode_stage(self, chunk_queue, row_queue, encode_batch):
+        """
+        Embed queued chunks in batches and pass them on for insertion.
+        
+        Chunks are gathered into groups of ENCODE_BATCHES_PER_CALL batches and
+        each group is handed to encode_batch in one call, which sorts the whole
+        group by length before splitting it into batches. A partial group is
+        encoded early if no more chunks arrive within ENCODE_FLUSH_WINDOW seconds.
+        
+        Args:
+            chunk_queue: Queue of (chunk IDs, chunks) pairs from the chunk stage
+            row_queue: Queue receiving (chunk IDs, chunks, embeddings) triples
+            encode_batch: Callable taking (texts, batch_size) and returning embeddings
+        """
+        encode_batch_size = self.encode_batch_size
+        group_size = encode_batch_size * ENCODE_BATCHES_PER_CALL
+        pending_ids, pending = [], []
+        active_workers = self.chunk_workers
+        while active_workers:
+            try:
+                item = chunk_queue.get(timeout=ENCODE_FLUSH_WINDOW)
+            except queue.Empty:
+                # Nothing arrived within the window; encode whatever is pending
+                window_expired = True
             else:
+                window_expired = False
+                if item is _SENTINEL:
+                    active_workers -= 1
+                else:
+                    pending_ids.extend(item[0])
+                    pending.extend(item[1])
+            
+            while len(pending) >= group_size or (pending and (not active_workers or window_expired)):
+                group_ids, pending_ids = pending_ids[:group_size], pending_ids[group_size:]
+                group, pending = pending[:group_size], pending[group_size:]
                 try:
-                    # Generate embedding for chunk
-                    embedding = self.embedding_model.encode(chunk)
-                    
-                    # Create a unique ID for this chunk
-                    unique_id = hash(chunk) % 2147483647  # Ensure ID is within INT32 range
-                    if unique_id in chunk_ids:
-                        unique_id = (unique_id + chunk_idx) % 2147483647
-                    chunk_ids[unique_id] = True
-                    
-                    # Add to batch
-                    batch_data.append({
-                        "id": unique_id,
-                        "embedding": embedding.tolist(),
-                        "text": chunk
-                    })
-                    
-                    # Insert batch when batch size is reached
-                    if len(batch_data) >= self.batch_size:
-                        self._insert_batch(batch_data)
-                        batch_data = []
+                    row_queue.put((group_ids, group, encode_batch(group, batch_size=encode_batch_size)))
                 except Exception as e:
-                    print(f"Error processing chunk {chunk_idx}: {e}")
+                    logger.error("Error embedding group of %d chunks: %s", len(group), e)
+    
+    def _insert_stage(self, row_queue):
+        """
+        Add embedded chunks to the shared insert buffer, inserting whenever it is full.
         
-        # Insert any remaining data
-        if batch_data:
-            self._insert_batch(batch_data)
+        Args:
+            row_queue: Queue of (chunk IDs, chunks, embeddings) triples, ended by a sentinel
+        """
+        while True:
+            item = row_queue.get()
+            if item is _SENTINEL:
+                break
+            
+            # Chunks were deduplicated upstream, so the 64-bit content hash is a unique ID
+            ids, chunks, embeddings = item
+            self._buffer_rows(np.asarray(ids, dtype=np.int64), np.asarray(embeddings, dtype=np.float32), chunks)
     
-    def _insert_batch(self, data):
+    def _buffer_rows(self, ids, embeddings, texts):
         """
-        Insert a batch of data into Milvus.
+        Copy rows into the insert buffer shared by all insert workers.
+        
+        Rows are written in place into a preallocated buffer of batch_size rows.
+        Once it is full it is swapped out under the lock and inserted outside it,
+        so other workers can keep buffering meanwhile.
         
         Args:
-            data: List of data items to insert
+            ids: Array of int64 chunk IDs
+            embeddings: Float32 array of shape (len(ids), dim)
+            texts: List of chunk texts
+        """
+        start = 0
+        while start < len(ids):
+            with self._lock:
+                if self._buffer is None:
+                    self._buffer = self._acquire_buffer(embeddings.shape[1])
+                buffer, fill = self._buffer, self._buffer_fill
+                end = min(len(ids), start + self.batch_size - fill)
+                buffer_ids, buffer_embeddings, buffer_texts = buffer
+                buffer_ids[fill:fill + end - start] = ids[start:end]
+                buffer_embeddings[fill:fill + end - start] = embeddings[start:end]
+                buffer_texts[fill:fill + end - start] = texts[start:end]
+                self._buffer_fill = fill + end - start
+                full = self._buffer_fill == self.batch_size
+                if full:
+                    self._buffer, self._buffer_fill = None, 0
+            if full:
+                self._insert_batch(buffer, self.batch_size)
+            start = end
+    
+    def _acquire_buffer(self, dimension):
         """
-        if not data:
-            return
+        Return an insert buffer whose rows have been written, allocating one if none is free.
+        
+        At most MAX_PENDING_INSERTS buffers are in flight, so only a few are ever allocated.
+        
+        Args:
+            dimension: Embedding dimension
             
-        ids = []
-        embeddings = []
-        texts = []
-          # Prepare data for insertion
-        print(f"Preparing {len(data)} records for insertion into Milvus...")
-        for item in tqdm(data, desc="Preparing data for Milvus"):
-            # Check if text exceeds limit
-            if len(item["text"]) > MAX_TEXT_SIZE:
-                print(f"Warning: Found item with text exceeding MAX_TEXT_SIZE ({len(item['text'])} > {MAX_TEXT_SIZE})")
-                # Try to truncate
-                print(f"Truncating text to {MAX_TEXT_SIZE} characters")
-                item["text"] = item["text"][:MAX_TEXT_SIZE]
-                
-            ids.append(item["id"])
-            embeddings.append(item["embedding"])
-            texts.append(item["text"])
+        Returns:
+            Tuple of (ids, embeddings, texts) arrays with batch_size rows
+        """
+        try:
+            return self._free_buffers.get_nowait()
+        except queue.Empty:
+            return (np.empty(self.batch_size, dtype=np.int64),
+                    np.empty((self.batch_size, dimension), dtype=np.float32),
+                    [None] * self.batch_size)
+    
+    def _release_buffer(self, buffer):
+        """Return a written insert buffer for reuse and free its insert slot."""
+        self._free_buffers.put(buffer)
+        self._insert_slots.release()
+    
+    def flush(self):
+        """
+        Insert whatever is left in the insert buffer.
+        
+        This only drains the local buffer; see finalize for flushing Milvus.
+        """
+        with self._lock:
+            buffer, fill = self._buffer, self._buffer_fill
+            self._buffer, self._buffer_fill = None, 0
+        if fill:
+            self._insert_batch(buffer, fill)
+        elif buffer is not None:
+            self._free_buffers.put(buffer)
+    
+    def _collect_url_chunks(self, url, content, content_fetcher):
+        """
+        Preprocess and chunk the fetched content of a single URL.
         
-        if not ids:
-            print("No valid data to insert after filtering")
-            return
+        Args:
+            url: URL the content was fetched from
+            content: Fetched text content
+            content_fetcher: ContentFetcher instance
             
+        Returns:
+            List of non-empty text chunks within the Milvus size limit, as
+            guaranteed by split_into_chunks
+        """
+        if not content:
+            logger.warning("Failed to fetch content from URL: %s", url)
+            return []
+        
         try:
-            # Insert data
-            print(f"Inserting {len(ids)} records into Milvus collection '{self.collection_name}'...")
-            self.milvus_ops.insert_data(self.collection_name, ids, embeddings, texts)
-            print(f"Successfully inserted {len(ids)} records into Milvus collection '{self.collection_name}'.")
+            content = content_fetcher.preprocess_text(content)
+            
+            # Always chunk content to ensure it's below Milvus limits
+            chunks = content_fetcher.split_into_chunks(content, min(self.max_text_length, MAX_TEXT_SIZE))
         except Exception as e:
-            print(f"Error inserting batch into Milvus: {e}")
+            logger.error("Error processing URL %s: %s", url, e)
+            return []
+        
+        if not chunks:
+            logger.debug("No valid content chunks to process for URL: %s", url)
+        return chunks
+    
+    def _insert_batch(self, buffer, count):
+        """
+        Submit the first rows of an insert buffer to the writer pool for insertion into Milvus.
+        
+        Blocks while MAX_PENDING_INSERTS batches are already in flight. The buffer
+        is only reused once its rows have been written.
+        
+        Args:
+            buffer: Tuple of (ids, embeddings, texts) from _acquire_buffer
+            count: Number of filled rows at the start of the buffer
+        """
+        ids, embeddings, texts = buffer
+        self._insert_slots.acquire()
+        future = self._insert_pool.submit(self._write_batch, ids[:count], embeddings[:count], texts[:count])
+        future.add_done_callback(lambda _: self._release_buffer(buffer))
+        with self._lock:
+            self._insert_futures.append(future)
+    
+    def _write_batch(self, ids, embeddings, texts):
+        """
+        Insert a batch of rows into Milvus, retrying while its task queue is full.
+        
+        Args:
+            ids: Array of int64 chunk IDs
+            embeddings: Float32 array of shape (len(ids), dim)
+            texts: List of chunk texts, already within MAX_TEXT_SIZE
+        """
+        for attempt in range(1, INSERT_RETRIES + 1):
+            try:
+                self.milvus_ops.insert_data(self.collection_name, ids, embeddings, texts, flush_after_insert=False)
+                return
+            except Exception as e:
+                if "task queue is full" in str(e).lower() and attempt < INSERT_RETRIES:
+                    logger.warning("Milvus task queue is full, retrying insert (attempt %d/%d)...", attempt, INSERT_RETRIES)
+                    time.sleep(INSERT_RETRY_DELAY * attempt)
+                    continue
+                logger.error("Error inserting batch into Milvus: %s", e)
+                return
     
-    def search(self, query_text, top_k=10):
+    def search(self, query_text, top_k=10, consistency_level=None):
         """
         Search for relevant content in Milvus.
         
         Args:
             query_text: The query text
             top_k: Number of top results to return
+            consistency_level: Milvus consistency level overriding the default, e.g.
+                "Strong" to see rows inserted right before the search
             
         Returns:
             List of search results
         """
-        query_embedding = self.embedding_model.encode(query_text)
+        query_embedding = self.query_encoder(query_text)
         
         search_results = self.milvus_ops.search_in_collection(
             self.collection_name, 
             query_embedding, 
-            top_k=top_k
+            top_k=top_k,
+            consistency_level=consistency_level
+        )
+        
+        logger.info("Search results for query '%s': %d matches", query_text, len(search_results))
+        return search_results
+    
+    def search_batch(self, queries, top_k=10, encode_batch=None, consistency_level=None):
+        """
+        Search for relevant content for several queries in a single Milvus request.
+        
+        Args:
+            queries: List of query texts
+            top_k: Number of top results to return per query
+            encode_batch: Callable taking (texts, batch_size) and returning embeddings;
+                each query is encoded with query_encoder when not given
+            consistency_level: Milvus consistency level overriding the default
+            
+        Returns:
+            List of search results per query, in query order
+        """
+        if not queries:
+            return []
+        if encode_batch is not None:
+            query_embeddings = encode_batch(queries, batch_size=self.encode_batch_size)
+        else:
+            query_embeddings = np.stack([self.query_encoder(query) for query in queries])
+        
+        search_results = self.milvus_ops.search_batch_in_collection(
+            self.collection_name,
+            query_embeddings,
+            top_k=top_k,
+            consistency_level=consistency_level
         )
         
-        print(f"\nSearch results for query '{query_text}': {len(search_results)} matches")
+        logger.info("Search results for %d queries: %d matches", len(queries), sum(map(len, search_results)))
         return search_results